@@ -1,31 +1,76 @@
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, Response, request, jsonify, send_file, render_template, stream_with_context
 from flask_cors import CORS
+import atexit
+import functools
+import hashlib
 import logging
+import queue
+import threading
+from collections import OrderedDict
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from io import BytesIO
 from PIL import Image, UnidentifiedImageError
 import io
 import os
+import requests as http_requests
+from requests.adapters import HTTPAdapter
 from werkzeug.utils import secure_filename
 
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+import numpy as np
+
+# Optional libjpeg-turbo bindings: SIMD JPEG encode without PIL's wrapper
+# overhead. Constructing TurboJPEG verifies the native library is present.
+try:
+    from turbojpeg import TJPF_RGB, TJSAMP_420, TurboJPEG
+    _turbo_jpeg = TurboJPEG()
+except Exception:
+    _turbo_jpeg = None
+
 from config import Config
 from services import EmbeddingService, VectorDBService, LLMService, OCRService, TTSService
 from utils import (
     validate_text_input,
     validate_image_file,
     validate_top_k,
+    validate_query_request,
     clean_text,
     format_response,
     handle_error,
     get_file_size_mb
 )
 
+# Log records are queued by request threads and drained to disk/console on a
+# background thread, so logger calls never block on file I/O under the
+# logging lock.
+os.makedirs('logs', exist_ok=True)
+
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_file_handler = logging.FileHandler('logs/app.log')
+_log_file_handler.setFormatter(_log_formatter)
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, _log_file_handler, _log_stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# QueueHandler.prepare() bakes its own formatter's output into the queued
+# record, so it must stay a pass-through %(message)s (basicConfig would
+# otherwise install its default formatter here and every line would be
+# double-formatted); the listener's handlers apply the real format.
+_log_queue_handler = QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[_log_queue_handler]
 )
 
 logger = logging.getLogger(__name__)
@@ -33,6 +78,20 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class OrjsonProvider(JSONProvider):
+        """C-implemented JSON encode/decode; also serializes numpy natively."""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+
 app.config['MAX_CONTENT_LENGTH'] = Config.MAX_CONTENT_LENGTH
 app.config['SECRET_KEY'] = os.urandom(24)
 
@@ -42,18 +101,119 @@ llm_service = None
 ocr_service = None
 tts_service = None
 
+# Shared pool for overlapping I/O-bound service calls (OCR, LLM) within a
+# request. Bounded so a burst of requests cannot starve the upstream APIs.
+io_executor = ThreadPoolExecutor(
+    max_workers=Config.CONCURRENCY_LIMIT,
+    thread_name_prefix='io-worker'
+)
+
+
+OCR_MAX_DIMENSION = 1024
+OCR_SKIP_REENCODE_BYTES = 500_000
+
+# Image decode/resize/encode holds the GIL for tens of ms; running it in a
+# process pool keeps it from serializing other requests on the threaded
+# server. Created lazily so plain imports (tests, scripts) stay cheap.
+preproc_pool = None
+_preproc_pool_failed = False
+
+
+def _get_preproc_pool():
+    global preproc_pool, _preproc_pool_failed
+    if preproc_pool is None and not _preproc_pool_failed:
+        try:
+            preproc_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        except Exception as e:
+            _preproc_pool_failed = True
+            logger.warning(f"Process pool unavailable, preprocessing inline: {str(e)}")
+    return preproc_pool
+
+
+def _upload_size(image_file):
+    """Size of an uploaded file in bytes without materializing its content."""
+    if getattr(image_file, 'content_length', None):
+        return image_file.content_length
+    stream = image_file.stream
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+
+def preprocess_image_offloaded(image_source):
+    """Run preprocess_image_for_ocr on the process pool, inline on failure.
+
+    Accepts raw bytes or a file-like object. The inline path hands streams
+    straight to PIL; the pool path reads bytes only because they must cross
+    the process boundary.
+    """
+    global preproc_pool
+    pool = _get_preproc_pool()
+    if pool is None:
+        return preprocess_image_for_ocr(image_source)
+    if not isinstance(image_source, (bytes, bytearray)):
+        image_source = image_source.read()
+    try:
+        return pool.submit(preprocess_image_for_ocr, image_source).result()
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.warning(f"Process pool failed ({str(e)}), preprocessing inline")
+        preproc_pool = None
+        return preprocess_image_for_ocr(image_source)
 
-def preprocess_image_for_ocr(image_bytes):
-    """Convert image to RGB, resize, and compress before OCR to reduce failures/timeouts."""
+
+def preprocess_image_for_ocr(image_source):
+    """Convert image to RGB, resize, and compress before OCR to reduce failures/timeouts.
+
+    Accepts raw bytes or a file-like object; streams go straight to PIL so no
+    extra full-image buffer is allocated.
+    """
     try:
-        image = Image.open(io.BytesIO(image_bytes))
+        if isinstance(image_source, (bytes, bytearray)):
+            stream = io.BytesIO(image_source)
+            source_size = len(image_source)
+        else:
+            stream = image_source
+            stream.seek(0, os.SEEK_END)
+            source_size = stream.tell()
+            stream.seek(0)
+
+        image = Image.open(stream)
+
+        # Small JPEGs are already within budget: skip decode/re-encode entirely.
+        if (image.format == 'JPEG'
+                and image.mode in ('RGB', 'L')
+                and max(image.size) <= OCR_MAX_DIMENSION
+                and source_size < OCR_SKIP_REENCODE_BYTES):
+            if isinstance(image_source, (bytes, bytearray)):
+                return image_source
+            stream.seek(0)
+            return stream.read()
+
+        # For JPEG input, ask libjpeg to decode near the target resolution
+        # (DCT-domain downscale); a no-op for other formats.
+        image.draft('RGB', (OCR_MAX_DIMENSION, OCR_MAX_DIMENSION))
 
         if image.mode == 'RGBA':
             image = image.convert('RGB')
         elif image.mode not in ('RGB', 'L'):
             image = image.convert('RGB')
 
-        image.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
+        if max(image.size) > OCR_MAX_DIMENSION:
+            image.thumbnail((OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.Resampling.LANCZOS)
+
+        if _turbo_jpeg is not None and image.mode == 'RGB':
+            try:
+                return _turbo_jpeg.encode(
+                    np.asarray(image),
+                    quality=85,
+                    pixel_format=TJPF_RGB,
+                    jpeg_subsample=TJSAMP_420,
+                )
+            except Exception as e:
+                logger.warning(f"TurboJPEG encode failed ({str(e)}), using PIL")
 
         output_buffer = io.BytesIO()
         image.save(output_buffer, format='JPEG', quality=85)
@@ -64,6 +224,45 @@ def preprocess_image_for_ocr(image_bytes):
     except Exception as e:
         raise ValueError(f"Image preprocessing failed: {str(e)}")
 
+# Bounded (search text, top_k) -> results cache. The corpus is read-only at
+# serving time, so entries never go stale; hot queries skip both the encode
+# and the ANN traversal.
+SEARCH_CACHE_SIZE = 512
+_search_cache = OrderedDict()
+_search_cache_lock = threading.Lock()
+
+# secure_filename is regex-heavy pure Python; filenames repeat often enough
+# (re-uploads, dev loops) that memoizing it skips the work on hot names.
+_safe_name = functools.lru_cache(maxsize=512)(secure_filename)
+
+
+def _cached_search(search_text, top_k, embedding=None):
+    """Vector search memoized on the search text; embeds lazily on a miss."""
+    key = (hashlib.sha1(search_text.encode('utf-8')).hexdigest(), top_k)
+
+    with _search_cache_lock:
+        if key in _search_cache:
+            _search_cache.move_to_end(key)
+            return _search_cache[key]
+
+    if embedding is None:
+        embedding = embedding_service.encode(search_text)
+    results = vector_db_service.search(embedding, top_k)
+
+    with _search_cache_lock:
+        _search_cache[key] = results
+        while len(_search_cache) > SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+
+    return results
+
+
+@functools.lru_cache(maxsize=128)
+def _tts_cached(text, language):
+    """Cache recent TTS audio blobs; repeats skip the gTTS network call."""
+    return tts_service.generate_audio(text, language=language or None)
+
+
 def initialize_services():
     """Initialize all services"""
     global embedding_service, vector_db_service, llm_service, ocr_service, tts_service
@@ -73,7 +272,13 @@ def initialize_services():
         logger.info("Initializing RAG System Services...")
         logger.info("=" * 60)
         
-        embedding_service = EmbeddingService(Config.MODEL_NAME)
+        embedding_service = EmbeddingService(
+            Config.MODEL_NAME,
+            cache_path=os.path.join(Config.CHROMA_DB_PATH, 'embedding_cache.sqlite3'),
+            dtype=Config.EMBED_DTYPE,
+            use_onnx_int8=Config.USE_ONNX_INT8,
+            onnx_cache_dir=Config.ONNX_CACHE_DIR
+        )
         
         vector_db_service = VectorDBService(
             db_path=Config.CHROMA_DB_PATH,
@@ -91,13 +296,22 @@ def initialize_services():
             llm_service = None
             logger.warning(f"LLM service unavailable: {str(e)}")
         
+        # One pooled session shared by outbound HTTP services: TLS handshakes
+        # to each upstream host are paid once, not per request. (The Groq SDK
+        # manages its own pooled httpx client internally.)
+        shared_session = http_requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64)
+        shared_session.mount('https://', adapter)
+        shared_session.mount('http://', adapter)
+
         try:
             ocr_service = OCRService(
                 api_key=Config.OCR_SPACE_API_KEY,
                 ocr_engine=Config.OCR_ENGINE,
                 timeout=Config.OCR_TIMEOUT,
                 retries=Config.OCR_RETRIES,
-                retry_delay=Config.OCR_RETRY_DELAY
+                retry_delay=Config.OCR_RETRY_DELAY,
+                session=shared_session
             )
         except Exception as e:
             ocr_service = None
@@ -172,6 +386,67 @@ def health_check():
             'error': str(e)
         }), 500
 
+def _handle_query_batch(queries, top_k):
+    """Answer a list of queries with one encode pass and one vector search."""
+    if not isinstance(queries, list) or not queries:
+        return jsonify(format_response(
+            success=False,
+            error="'queries' must be a non-empty list of strings"
+        )), 400
+
+    queries = [(q or '').strip() if isinstance(q, str) else '' for q in queries]
+    for query in queries:
+        is_valid, error = validate_text_input(query)
+        if not is_valid:
+            return jsonify(format_response(success=False, error=error)), 400
+
+    is_valid_k, error_k, top_k = validate_top_k(top_k)
+    if not is_valid_k:
+        logger.warning(f"Invalid top_k: {error_k}, using default: {top_k}")
+
+    logger.debug(f"Processing query batch of {len(queries)} (top_k={top_k})")
+
+    if len(queries) == 1:
+        embeddings = [embedding_service.encode(queries[0])]
+    else:
+        embeddings = embedding_service.encode(queries)
+    results = vector_db_service.search_many(embeddings, top_k)
+
+    # LLM answers are still one call per query, but they run concurrently
+    # on the shared pool.
+    futures = []
+    for query, documents in zip(queries, results['documents']):
+        if not documents:
+            futures.append(None)
+            continue
+        prompt = llm_service.build_text_query_prompt(
+            context="\n\n".join(documents),
+            query=query
+        )
+        futures.append(io_executor.submit(llm_service.generate_answer, prompt))
+
+    answers = []
+    for query, documents, future in zip(queries, results['documents'], futures):
+        if future is None:
+            answers.append({
+                'query': query,
+                'answer': 'No relevant information found in the knowledge base.',
+                'chunks_used': 0
+            })
+        else:
+            answers.append({
+                'query': query,
+                'answer': future.result(),
+                'chunks_used': len(documents)
+            })
+
+    return jsonify(format_response(
+        success=True,
+        data={'answers': answers},
+        message="Query batch processed successfully"
+    ))
+
+
 @app.route('/api/query', methods=['POST'])
 def api_query_text():
     """Text query endpoint"""
@@ -190,21 +465,34 @@ def api_query_text():
                 error="No JSON data provided"
             )), 400
         
-        query = data.get('query', '').strip()
         top_k = data.get('top_k', Config.TOP_K)
-        
-        is_valid, error = validate_text_input(query)
+
+        queries = data.get('queries')
+        if queries is not None:
+            return _handle_query_batch(queries, top_k)
+
+        query = data.get('query', '').strip()
+
+        is_valid, error, top_k = validate_query_request(query, top_k)
         if not is_valid:
             return jsonify(format_response(success=False, error=error)), 400
-        
-        is_valid_k, error_k, top_k = validate_top_k(top_k)
-        if not is_valid_k:
-            logger.warning(f"Invalid top_k: {error_k}, using default: {top_k}")
-        
-        logger.info(f"Processing text query: {query[:50]}... (top_k={top_k})")
-        
-        query_embedding = embedding_service.encode(query)
-        results = vector_db_service.search(query_embedding, top_k)
+
+        logger.debug(f"Processing text query: {query[:50]}... (top_k={top_k})")
+
+        # Primed FAQ answers short-circuit search and generation entirely;
+        # the encode result is reused by the search below on a miss.
+        query_embedding = None
+        if embedding_service is not None and llm_service.has_canned():
+            query_embedding = embedding_service.encode(query)
+            canned_answer = llm_service.maybe_canned(query_embedding)
+            if canned_answer is not None:
+                return jsonify(format_response(
+                    success=True,
+                    data={'answer': canned_answer, 'chunks_used': 0},
+                    message="Answered from canned answer cache"
+                ))
+
+        results = _cached_search(query, top_k, embedding=query_embedding)
         
         if not results['documents'][0]:
             return jsonify(format_response(
@@ -222,7 +510,7 @@ def api_query_text():
         
         answer = llm_service.generate_answer(prompt)
         
-        logger.info(f"Query successful: {len(answer)} characters generated")
+        logger.debug(f"Query successful: {len(answer)} characters generated")
         
         return jsonify(format_response(
             success=True,
@@ -234,8 +522,60 @@ def api_query_text():
         ))
     
     except Exception as e:
-        logger.error(f"Query error: {str(e)}", exc_info=True)
-        return jsonify(handle_error(e, "Query processing")), 500
+        return jsonify(handle_error(e, "Query processing", expected=isinstance(e, ValueError))), 500
+
+@app.route('/api/query/stream', methods=['POST'])
+def api_query_text_stream():
+    """Text query endpoint that streams the answer as server-sent events"""
+    try:
+        if llm_service is None:
+            return jsonify(format_response(
+                success=False,
+                error="LLM service is unavailable. Check dependencies and GROQ configuration."
+            )), 503
+
+        data = request.get_json()
+
+        if not data:
+            return jsonify(format_response(
+                success=False,
+                error="No JSON data provided"
+            )), 400
+
+        query = data.get('query', '').strip()
+        top_k = data.get('top_k', Config.TOP_K)
+
+        is_valid, error, top_k = validate_query_request(query, top_k)
+        if not is_valid:
+            return jsonify(format_response(success=False, error=error)), 400
+
+        results = _cached_search(query, top_k)
+        context = "\n\n".join(results['documents'][0]) if results['documents'][0] else ""
+
+        prompt = llm_service.build_text_query_prompt(context=context, query=query)
+
+        def generate():
+            try:
+                for token in llm_service.generate_streaming(prompt):
+                    yield f"data: {app.json.dumps({'token': token})}\n\n"
+                yield "data: [DONE]\n\n"
+            except Exception as e:
+                logger.error(f"Streaming query error: {str(e)}", exc_info=True)
+                yield f"data: {app.json.dumps({'error': str(e)})}\n\n"
+
+        # Tokens reach the client as they are generated; X-Accel-Buffering
+        # stops reverse proxies from collecting the whole response first.
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no',
+            }
+        )
+
+    except Exception as e:
+        return jsonify(handle_error(e, "Query processing", expected=isinstance(e, ValueError))), 500
 
 @app.route('/api/ocr', methods=['POST'])
 def api_ocr_extract():
@@ -259,15 +599,14 @@ def api_ocr_extract():
         if not is_valid:
             return jsonify(format_response(success=False, error=error)), 400
         
-        filename = secure_filename(image_file.filename)
-        logger.info(f"Processing OCR for image: {filename}")
+        filename = _safe_name(image_file.filename)
+        logger.debug(f"Processing OCR for image: {filename}")
         
-        original_bytes = image_file.read()
-        image_bytes = preprocess_image_for_ocr(original_bytes)
-        original_size = get_file_size_mb(len(original_bytes))
+        original_size = get_file_size_mb(_upload_size(image_file))
+        image_bytes = preprocess_image_offloaded(image_file.stream)
         processed_size = get_file_size_mb(len(image_bytes))
         
-        logger.info(f"Image size (original/processed): {original_size} MB / {processed_size} MB")
+        logger.debug(f"Image size (original/processed): {original_size} MB / {processed_size} MB")
         
         extracted_text = ocr_service.extract_text(image_bytes)
 
@@ -277,7 +616,7 @@ def api_ocr_extract():
                 error=extracted_text
             )), 503
         
-        logger.info(f"OCR successful: {len(extracted_text)} characters extracted")
+        logger.debug(f"OCR successful: {len(extracted_text)} characters extracted")
         
         return jsonify(format_response(
             success=True,
@@ -286,8 +625,7 @@ def api_ocr_extract():
         ))
     
     except Exception as e:
-        logger.error(f"OCR error: {str(e)}", exc_info=True)
-        return jsonify(handle_error(e, "OCR processing")), 500
+        return jsonify(handle_error(e, "OCR processing", expected=isinstance(e, ValueError))), 500
 
 @app.route('/api/image-query', methods=['POST'])
 def api_image_query():
@@ -324,13 +662,18 @@ def api_image_query():
         if not is_valid_k:
             logger.warning(f"Invalid top_k: {error_k}, using: {top_k}")
         
-        filename = secure_filename(image_file.filename)
-        logger.info(f"Processing image query: {filename}, query: '{query}'")
-        
-        original_bytes = image_file.read()
-        image_bytes = preprocess_image_for_ocr(original_bytes)
+        filename = _safe_name(image_file.filename)
+        logger.debug(f"Processing image query: {filename}, query: '{query}'")
         
-        extracted_text = ocr_service.extract_text(image_bytes)
+        image_bytes = preprocess_image_offloaded(image_file.stream)
+
+        # OCR is a network RPC; run it on the shared pool and overlap it with
+        # warming the embedding caches for the user's own query text.
+        ocr_future = io_executor.submit(ocr_service.extract_text, image_bytes)
+        if query:
+            embedding_service.encode_async(query)
+
+        extracted_text = ocr_future.result()
 
         if extracted_text.startswith("Error:"):
             return jsonify(format_response(
@@ -349,10 +692,24 @@ def api_image_query():
                 },
                 message="OCR completed but no text found"
             ))
-        
+
+        # A couple of stray words with no user question is not worth an
+        # embed + search + LLM round-trip; answer directly.
+        if len(extracted_text.split()) < 3 and not query:
+            return jsonify(format_response(
+                success=True,
+                data={
+                    'extracted_text': extracted_text,
+                    'answer': 'Not enough text to query.',
+                    'video_context': '',
+                    'chunks_used': 0
+                },
+                message="OCR completed but extracted text is too short to query"
+            ))
+
         search_query = f"{extracted_text} {query}" if query else extracted_text
-        query_embedding = embedding_service.encode(search_query)
-        results = vector_db_service.search(query_embedding, top_k)
+        query_embedding = embedding_service.encode_async(search_query).result()
+        results = _cached_search(search_query, top_k, embedding=query_embedding)
         
         video_context = "\n\n".join(results['documents'][0]) if results['documents'][0] else ""
         
@@ -365,7 +722,7 @@ def api_image_query():
         
         answer = llm_service.generate_answer(prompt)
         
-        logger.info(f"Image query successful: {len(answer)} characters generated")
+        logger.debug(f"Image query successful: {len(answer)} characters generated")
         
         return jsonify(format_response(
             success=True,
@@ -379,8 +736,7 @@ def api_image_query():
         ))
     
     except Exception as e:
-        logger.error(f"Image query error: {str(e)}", exc_info=True)
-        return jsonify(handle_error(e, "Image query processing")), 500
+        return jsonify(handle_error(e, "Image query processing", expected=isinstance(e, ValueError))), 500
 
 @app.route('/api/tts', methods=['POST'])
 def api_text_to_speech():
@@ -401,29 +757,38 @@ def api_text_to_speech():
             )), 400
         
         text = data.get('text', '').strip()
-        
+        language = data.get('language', '')
+
         if not text:
             return jsonify(format_response(
                 success=False,
                 error="Text is required"
             )), 400
-        
-        logger.info(f"Generating TTS for text: {text[:50]}...")
-        
-        audio_bytes = tts_service.generate_audio(text)
-        
-        logger.info(f"TTS successful: {len(audio_bytes)} bytes generated")
-        
-        return send_file(
+
+        # Identical text+language always produces the same MP3, so clients
+        # sending If-None-Match can skip synthesis and the transfer entirely.
+        etag = hashlib.sha1(text.encode('utf-8') + b'\x00' + language.encode('utf-8')).hexdigest()
+        if etag in request.if_none_match:
+            return '', 304
+
+        logger.debug(f"Generating TTS for text: {text[:50]}...")
+
+        audio_bytes = _tts_cached(text, language)
+
+        logger.debug(f"TTS successful: {len(audio_bytes)} bytes generated")
+
+        response = send_file(
             BytesIO(audio_bytes),
             mimetype='audio/mpeg',
             as_attachment=True,
             download_name='audio.mp3'
         )
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        return response
     
     except Exception as e:
-        logger.error(f"TTS error: {str(e)}", exc_info=True)
-        return jsonify(handle_error(e, "Text-to-speech")), 500
+        return jsonify(handle_error(e, "Text-to-speech", expected=isinstance(e, ValueError))), 500
 
 @app.errorhandler(404)
 def not_found(error):
@@ -15,12 +15,20 @@ class Config:
     
     # Model Configuration
     MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2")
+    EMBED_DTYPE = os.getenv("EMBED_DTYPE", "float32")  # float32 | float16 | bfloat16
+    # Serve embeddings from an int8-quantized ONNX export instead of torch.
+    # Requires the optional optimum[onnxruntime] package.
+    USE_ONNX_INT8 = os.getenv("USE_ONNX_INT8", "False").lower() in ('true', '1', 'yes')
+    ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "onnx_cache")
     LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
     LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
     LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "1000"))
     
     # Search Configuration
     TOP_K = int(os.getenv("TOP_K", "5"))
+
+    # Concurrency Configuration
+    CONCURRENCY_LIMIT = int(os.getenv("CONCURRENCY_LIMIT", "8"))
     
     # Server Configuration
     HOST = os.getenv("HOST", "0.0.0.0")
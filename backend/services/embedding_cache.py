@@ -0,0 +1,83 @@
+import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache keyed by (model_name, sha256(text)).
+
+    Vectors are stored as raw float32 bytes so lookups avoid re-running the
+    embedding model across process restarts. Including the model name in the
+    key means swapping models invalidates old entries cleanly.
+    """
+
+    def __init__(self, db_path):
+        if not db_path:
+            raise ValueError("Cache database path is required")
+
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embed_cache ("
+            "model TEXT NOT NULL, "
+            "hash BLOB NOT NULL, "
+            "vec BLOB NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+        logger.info("Embedding cache opened: %s", db_path)
+
+    def get(self, model_name, text_hash):
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT vec FROM embed_cache WHERE model = ? AND hash = ?",
+                    (model_name, text_hash),
+                ).fetchone()
+        except Exception as exc:
+            logger.warning("Embedding cache read failed: %s", str(exc))
+            return None
+
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def put(self, model_name, text_hash, vector):
+        try:
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embed_cache (model, hash, vec) VALUES (?, ?, ?)",
+                    (model_name, text_hash, blob),
+                )
+                self._conn.commit()
+        except Exception as exc:
+            logger.warning("Embedding cache write failed: %s", str(exc))
+
+    def count(self):
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT COUNT(*) FROM embed_cache").fetchone()
+            return int(row[0])
+        except Exception as exc:
+            logger.warning("Embedding cache count failed: %s", str(exc))
+            return 0
+
+    def close(self):
+        try:
+            with self._lock:
+                self._conn.close()
+        except Exception:
+            pass
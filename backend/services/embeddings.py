@@ -1,7 +1,14 @@
+import functools
 import hashlib
 import logging
-import math
+import os
+import queue
 import re
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -12,15 +19,75 @@ except Exception as exc:
     torch = None
     ST_IMPORT_ERROR = exc
 
+try:
+    import xxhash
+except Exception:
+    xxhash = None
+
+from .embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9_]+")
+
+# The fallback encoder only needs well-distributed bytes, not cryptographic
+# strength; xxh3 is several times cheaper per token than SHA-256 when present.
+if xxhash is not None:
+    _FALLBACK_HASH_NAME = 'xxh3'
+
+    def _token_digest(data):
+        return xxhash.xxh3_128(data).digest()
+else:
+    _FALLBACK_HASH_NAME = 'sha256'
+
+    def _token_digest(data):
+        return hashlib.sha256(data).digest()
+
+_FALLBACK_DIGEST_SIZE = len(_token_digest(b'probe'))
+
 
 class EmbeddingService:
-    def __init__(self, model_name='all-MiniLM-L6-v2', fallback_dim=384):
+    def __init__(self, model_name='all-MiniLM-L6-v2', fallback_dim=384, cache_size=1024,
+                 cache_path=None, dtype='float32', use_onnx_int8=False, onnx_cache_dir='onnx_cache'):
         self.mode = 'sentence_transformers'
         self.model_name = model_name
         self.fallback_dim = int(fallback_dim)
         self.model = None
+        self.dtype = (dtype or 'float32').lower()
+        self._reduced_precision = False
+        self._onnx_session = None
+        self._onnx_tokenizer = None
+        # Per-instance LRU so repeated query strings skip the model forward pass.
+        self._encode_cached = functools.lru_cache(maxsize=cache_size)(self._encode_single)
+
+        # Optional persistent cache so repeated queries survive restarts.
+        self._persistent_cache = None
+        if cache_path:
+            try:
+                self._persistent_cache = EmbeddingCache(cache_path)
+            except Exception as exc:
+                logger.warning("Persistent embedding cache unavailable: %s", str(exc))
+
+        # Micro-batching state: concurrent encode_async() calls are coalesced
+        # into a single batched model.encode() by a lazily started worker.
+        self._batch_queue = queue.Queue()
+        self._batch_thread = None
+        self._batch_lock = threading.Lock()
+        self.batch_max_size = 32
+        self.batch_window_seconds = 0.005
+
+        if use_onnx_int8:
+            try:
+                self._initialize_onnx(model_name, onnx_cache_dir)
+                self.mode = 'onnx_int8'
+                self._warmup('cpu')
+                logger.info("Embedding model loaded: %s via int8 ONNX Runtime", model_name)
+                return
+            except Exception as exc:
+                logger.warning(
+                    "ONNX int8 path unavailable (%s). Falling back to torch.",
+                    str(exc),
+                )
 
         if SentenceTransformer is None:
             self.mode = 'fallback_hash'
@@ -33,7 +100,14 @@ class EmbeddingService:
         try:
             device = 'cuda' if torch and torch.cuda.is_available() else 'cpu'
             self.model = SentenceTransformer(model_name, device=device)
-            logger.info("Embedding model loaded: %s on %s", model_name, device)
+            # Inference-only service: drop autograd bookkeeping and cap CPU
+            # threads so Flask's worker threads do not oversubscribe OpenMP.
+            torch.set_grad_enabled(False)
+            self.model.eval()
+            torch.set_num_threads(min(4, os.cpu_count() or 1))
+            self._apply_dtype(device)
+            self._warmup(device)
+            logger.info("Embedding model loaded: %s on %s (dtype=%s)", model_name, device, self.dtype)
         except Exception as exc:
             self.mode = 'fallback_hash'
             logger.warning(
@@ -41,26 +115,189 @@ class EmbeddingService:
                 str(exc),
             )
 
+    def _apply_dtype(self, device):
+        """Switch the loaded model to half precision when configured.
+
+        FP16 requires CUDA; BF16 works on CPU where supported. Falls back to
+        FP32 (with a warning) when the requested dtype is not usable, so a
+        bad EMBED_DTYPE never takes the service down.
+        """
+        if self.dtype in ('float32', 'fp32', ''):
+            return
+        try:
+            if self.dtype in ('float16', 'fp16', 'half'):
+                if device != 'cuda':
+                    logger.warning("EMBED_DTYPE=float16 requires CUDA; keeping float32")
+                    self.dtype = 'float32'
+                    return
+                self.model.half()
+            elif self.dtype in ('bfloat16', 'bf16'):
+                self.model = self.model.to(dtype=torch.bfloat16)
+            else:
+                logger.warning("Unknown EMBED_DTYPE '%s'; keeping float32", self.dtype)
+                self.dtype = 'float32'
+                return
+            self._reduced_precision = True
+        except Exception as exc:
+            logger.warning("Could not switch model to %s (%s); keeping float32", self.dtype, str(exc))
+            self.dtype = 'float32'
+
+    def _initialize_onnx(self, model_name, cache_dir):
+        """Export the model to ONNX, quantize weights to int8, and open an
+        onnxruntime session. Requires the optional optimum[onnxruntime]
+        package; callers treat any failure here as 'use the torch path'."""
+        import onnxruntime
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        hf_model_id = model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+        export_dir = os.path.join(cache_dir, model_name.replace('/', '_'))
+        quantized_path = os.path.join(export_dir, 'model_int8.onnx')
+
+        if not os.path.exists(quantized_path):
+            os.makedirs(export_dir, exist_ok=True)
+            ort_model = ORTModelForFeatureExtraction.from_pretrained(
+                hf_model_id,
+                export=True,
+                provider='CPUExecutionProvider',
+            )
+            ort_model.save_pretrained(export_dir)
+            quantize_dynamic(
+                os.path.join(export_dir, 'model.onnx'),
+                quantized_path,
+                weight_type=QuantType.QInt8,
+            )
+
+        self._onnx_tokenizer = AutoTokenizer.from_pretrained(hf_model_id)
+        self._onnx_session = onnxruntime.InferenceSession(
+            quantized_path,
+            providers=['CPUExecutionProvider'],
+        )
+
+    def _onnx_encode(self, texts):
+        """Tokenize, run the int8 session, then mean-pool and L2-normalize
+        (the same pooling pipeline the SentenceTransformer applies)."""
+        encoded = self._onnx_tokenizer(
+            list(texts),
+            padding=True,
+            truncation=True,
+            return_tensors='np',
+        )
+        inputs = {
+            name.name: encoded[name.name].astype(np.int64)
+            for name in self._onnx_session.get_inputs()
+            if name.name in encoded
+        }
+        token_embeddings = self._onnx_session.run(None, inputs)[0]
+
+        mask = encoded['attention_mask'][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.maximum(norms, 1e-12)
+
+    def _warmup(self, device):
+        """Prime kernels/tracing so the first real query runs at steady state.
+
+        Without this the first /api/query pays for graph tracing and (on GPU)
+        cuDNN algorithm selection.
+        """
+        try:
+            if device == 'cuda':
+                torch.backends.cudnn.benchmark = True
+            self._model_encode(["warmup"] * 4, batch_size=4)
+        except Exception as exc:
+            logger.warning("Embedding model warmup failed: %s", str(exc))
+
+    def _model_ready(self):
+        if self.mode == 'sentence_transformers':
+            return self.model is not None
+        if self.mode == 'onnx_int8':
+            return self._onnx_session is not None
+        return False
+
+    def _model_encode(self, texts, batch_size=32, show_progress_bar=False):
+        """Run model.encode under inference mode, casting reduced-precision
+        outputs back to float32."""
+        if self.mode == 'onnx_int8':
+            return self._onnx_encode(texts)
+        with torch.inference_mode():
+            if self._reduced_precision:
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=batch_size,
+                    show_progress_bar=show_progress_bar,
+                    convert_to_tensor=True,
+                )
+                return embeddings.float().cpu().numpy()
+            return self.model.encode(
+                texts,
+                batch_size=batch_size,
+                show_progress_bar=show_progress_bar,
+                convert_to_tensor=False,
+            )
+
     def _encode_fallback_single(self, text):
-        vector = [0.0] * self.fallback_dim
-        tokens = re.findall(r"[a-zA-Z0-9_]+", text.lower())
+        tokens = _TOKEN_RE.findall(text.lower())
 
         if not tokens:
-            return vector
+            return [0.0] * self.fallback_dim
 
-        for token in tokens:
-            digest = hashlib.sha256(token.encode('utf-8')).digest()
-            idx = int.from_bytes(digest[:4], 'little') % self.fallback_dim
-            sign = 1.0 if (digest[4] % 2 == 0) else -1.0
-            vector[idx] += sign
+        # Bulk-hash all tokens and derive indices/signs with array ops instead
+        # of a per-token Python loop.
+        digests = np.frombuffer(
+            b''.join(_token_digest(token.encode('utf-8')) for token in tokens),
+            dtype=np.uint8,
+        ).reshape(-1, _FALLBACK_DIGEST_SIZE)
+        idx = digests[:, :4].copy().view(np.dtype('<u4')).ravel() % self.fallback_dim
+        signs = np.where(digests[:, 4] & 1, -1.0, 1.0)
 
-        norm = math.sqrt(sum(v * v for v in vector))
+        # bincount walks idx sequentially in one C loop, avoiding the slow
+        # ufunc.at scatter path.
+        vector = np.bincount(idx, weights=signs, minlength=self.fallback_dim)
+
+        norm = np.linalg.norm(vector)
         if norm > 0:
-            vector = [v / norm for v in vector]
+            vector /= norm
+
+        return vector.tolist()
 
-        return vector
+    def _encode_single(self, text):
+        """Encode one string, returning an immutable tuple (safe to cache)."""
+        text_hash = None
+        if self._persistent_cache is not None:
+            text_hash = hashlib.sha256(text.encode('utf-8')).digest()
+            cached = self._persistent_cache.get(self._cache_model_name(), text_hash)
+            if cached is not None:
+                return tuple(cached)
+
+        if self._model_ready():
+            embedding = self._model_encode([text])
+            vector = embedding[0].tolist()
+        else:
+            vector = self._encode_fallback_single(text)
+
+        if text_hash is not None:
+            self._persistent_cache.put(self._cache_model_name(), text_hash, vector)
+        return tuple(float(v) for v in vector)
+
+    def _cache_model_name(self):
+        if self.mode == 'sentence_transformers':
+            return self.model_name
+        if self.mode == 'onnx_int8':
+            # Quantized vectors differ slightly from the torch ones; keep
+            # them under their own cache key.
+            return f"{self.model_name}-onnx-int8"
+        # Include the hash algorithm so cached fallback vectors do not mix
+        # across environments with and without xxhash.
+        return f"fallback-{_FALLBACK_HASH_NAME}-{self.fallback_dim}"
 
     def encode(self, text):
+        """Encode a string (or list of strings) to float32 ndarray embeddings.
+
+        Returning ndarrays avoids materializing a Python float object per
+        dimension; callers needing JSON-safe values use as_list().
+        """
         try:
             if isinstance(text, str):
                 text = [text]
@@ -70,41 +307,108 @@ class EmbeddingService:
             if not text or all((t or '').strip() == '' for t in text):
                 raise ValueError("Input text cannot be empty")
 
-            if self.mode == 'sentence_transformers' and self.model is not None:
-                embedding = self.model.encode(text, convert_to_tensor=False)
-                if len(text) == 1:
-                    return embedding[0].tolist()
-                return [emb.tolist() for emb in embedding]
-
-            embeddings = [self._encode_fallback_single(t) for t in text]
             if len(text) == 1:
-                return embeddings[0]
-            return embeddings
+                return np.asarray(self._encode_cached(text[0]), dtype=np.float32)
+
+            if self._model_ready():
+                return np.asarray(self._model_encode(text), dtype=np.float32)
+
+            return np.asarray(
+                [self._encode_fallback_single(t) for t in text],
+                dtype=np.float32,
+            )
 
         except Exception as exc:
             logger.error("Encoding error: %s", str(exc))
             raise
 
+    @staticmethod
+    def as_list(embedding):
+        """Convert an embedding (or batch) back to plain lists for JSON."""
+        if isinstance(embedding, np.ndarray):
+            return embedding.tolist()
+        return list(embedding)
+
+    def encode_async(self, text):
+        """Queue a single string for batched encoding; returns a Future.
+
+        Requests arriving within the batching window are encoded in one
+        model.encode() call, amortizing per-call overhead under load.
+        """
+        if not isinstance(text, str):
+            raise ValueError("Input must be a string")
+        if not text.strip():
+            raise ValueError("Input text cannot be empty")
+
+        self._ensure_batch_worker()
+        future = Future()
+        self._batch_queue.put((text, future))
+        return future
+
+    def _ensure_batch_worker(self):
+        if self._batch_thread is not None:
+            return
+        with self._batch_lock:
+            if self._batch_thread is None:
+                worker = threading.Thread(
+                    target=self._batch_worker,
+                    name='embedding-batcher',
+                    daemon=True,
+                )
+                worker.start()
+                self._batch_thread = worker
+
+    def _batch_worker(self):
+        while True:
+            items = [self._batch_queue.get()]
+            deadline = time.monotonic() + self.batch_window_seconds
+            while len(items) < self.batch_max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._batch_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                if len(items) == 1:
+                    # No batch formed; take the cached single-string path.
+                    vectors = [np.asarray(self._encode_cached(items[0][0]), dtype=np.float32)]
+                else:
+                    vectors = self.encode([text for text, _ in items])
+                for (_, future), vector in zip(items, vectors):
+                    future.set_result(vector)
+            except Exception as exc:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+
     def encode_batch(self, texts, batch_size=32):
         try:
             if not isinstance(texts, list):
                 raise ValueError("Input must be a list of strings")
 
-            if self.mode == 'sentence_transformers' and self.model is not None:
-                embeddings = self.model.encode(
+            if self._model_ready():
+                embeddings = self._model_encode(
                     texts,
                     batch_size=batch_size,
                     show_progress_bar=True,
-                    convert_to_tensor=False
                 )
-                return [emb.tolist() for emb in embeddings]
+                return np.asarray(embeddings, dtype=np.float32)
 
-            return [self._encode_fallback_single(text or '') for text in texts]
+            return np.asarray(
+                [self._encode_fallback_single(text or '') for text in texts],
+                dtype=np.float32,
+            )
 
         except Exception as exc:
             logger.error("Batch encoding error: %s", str(exc))
             raise
 
+    def get_cache_info(self):
+        return self._encode_cached.cache_info()._asdict()
+
     def get_model_info(self):
         if self.mode == 'sentence_transformers' and self.model is not None:
             return {
@@ -112,7 +416,18 @@ class EmbeddingService:
                 'model_name': self.model._model_card_vars.get('model_name', self.model_name),
                 'max_seq_length': self.model.max_seq_length,
                 'embedding_dimension': self.model.get_sentence_embedding_dimension(),
-                'device': str(self.model.device)
+                'device': str(self.model.device),
+                'encode_cache': self.get_cache_info()
+            }
+
+        if self.mode == 'onnx_int8' and self._onnx_session is not None:
+            return {
+                'mode': self.mode,
+                'model_name': self.model_name,
+                'max_seq_length': getattr(self._onnx_tokenizer, 'model_max_length', None),
+                'embedding_dimension': None,
+                'device': 'cpu',
+                'encode_cache': self.get_cache_info()
             }
 
         return {
@@ -120,5 +435,6 @@ class EmbeddingService:
             'model_name': 'fallback-hash-embedding',
             'max_seq_length': None,
             'embedding_dimension': self.fallback_dim,
-            'device': 'cpu'
+            'device': 'cpu',
+            'encode_cache': self.get_cache_info()
         }
@@ -1,8 +1,25 @@
 from groq import Groq
+import hashlib
+import httpx
 import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Answers are only cached for near-deterministic calls; above this
+# temperature repeated prompts are expected to produce different text.
+ANSWER_CACHE_MAX_TEMPERATURE = 0.3
+ANSWER_CACHE_SIZE = 256
+ANSWER_CACHE_TTL_SECONDS = 3600.0
+
+# Minimum cosine similarity between a query embedding and a primed question
+# before its canned answer is served instead of calling the LLM.
+CANNED_ANSWER_THRESHOLD = 0.93
+
 
 TEXT_QUERY_INSTRUCTIONS = """Instructions:
 - Use information from the video content when available
@@ -34,32 +51,130 @@ IMAGE_QUERY_INSTRUCTIONS = """INSTRUCTIONS:
 - If video text is not present, explain the concept precisely"""
 
 
+# Prompt templates pre-split into static segments, joined with the dynamic
+# parts at request time.
+_TEXT_SYSTEM = (
+    TEXT_QUERY_INSTRUCTIONS
+    + "\n\nYou are a helpful AI assistant answering questions about video content."
+)
+_TEXT_USER_SEGMENTS = (
+    "Video Content:\n",
+    "\n\nQuestion: ",
+    "\n\nProvide a clear and helpful answer:",
+)
+
+_IMAGE_SYSTEM_SUFFIX = (
+    "\n\nYou are a helpful AI assistant that combines information from multiple sources."
+)
+_IMAGE_SYSTEM_DEFAULT = IMAGE_QUERY_INSTRUCTIONS + _IMAGE_SYSTEM_SUFFIX
+_IMAGE_USER_SEGMENTS = (
+    "TEXT EXTRACTED FROM IMAGE (via OCR):\n",
+    "\n\nRELATED CONTENT FROM VIDEO DATABASE:\n",
+    "\n\nUSER QUESTION: ",
+    "\n\nProvide a comprehensive answer:",
+)
+
+
 class LLMService:
     def __init__(self, api_key, model_name='llama-3.3-70b-versatile', temperature=0.7, max_tokens=1000):
         try:
             if not api_key:
                 raise ValueError("GROQ_API_KEY is required")
 
-            self.client = Groq(api_key=api_key)
+            # Persistent connection pool: completions reuse warm TCP+TLS
+            # connections instead of paying the handshake per request.
+            self.client = Groq(
+                api_key=api_key,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+                    timeout=httpx.Timeout(30.0, connect=5.0),
+                ),
+            )
             self.model_name = model_name
             self.temperature = temperature
             self.max_tokens = max_tokens
 
+            # Exact-match answer cache: repeated low-temperature prompts
+            # return in microseconds instead of paying TTFT + generation.
+            self._answer_cache = OrderedDict()
+            self._answer_cache_lock = threading.Lock()
+
+            # Canned-answer hot set: (unit-norm question matrix, answers).
+            # Primed FAQ-style questions short-circuit Groq entirely.
+            self._canned_matrix = None
+            self._canned_answers = []
+
             logger.info("Groq LLM service initialized with model: %s", model_name)
         except Exception as e:
             logger.error("Groq initialization failed: %s", str(e))
             raise
 
+    def _answer_cache_get(self, key):
+        with self._answer_cache_lock:
+            entry = self._answer_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, answer = entry
+            if time.monotonic() - stored_at > ANSWER_CACHE_TTL_SECONDS:
+                del self._answer_cache[key]
+                return None
+            self._answer_cache.move_to_end(key)
+            return answer
+
+    def _answer_cache_put(self, key, answer):
+        with self._answer_cache_lock:
+            self._answer_cache[key] = (time.monotonic(), answer)
+            self._answer_cache.move_to_end(key)
+            while len(self._answer_cache) > ANSWER_CACHE_SIZE:
+                self._answer_cache.popitem(last=False)
+
+    @staticmethod
+    def _build_messages(prompt):
+        """Turn a plain string or a {"system", "user"} dict into chat messages.
+
+        The dict form keeps the byte-stable instruction block at the start of
+        the system message, so providers that hash message prefixes can serve
+        the static part from their prompt cache.
+        """
+        if isinstance(prompt, dict):
+            return [
+                {"role": "system", "content": prompt["system"]},
+                {"role": "user", "content": prompt["user"]},
+            ]
+        return [{"role": "user", "content": prompt}]
+
+    @staticmethod
+    def _prompt_text(prompt):
+        """Canonical text of a prompt (for validation and cache keys)."""
+        if isinstance(prompt, dict):
+            return (prompt.get("system") or '') + "\x00" + (prompt.get("user") or '')
+        return prompt or ''
+
     def generate_answer(self, prompt, temperature=None, max_tokens=None, timeout=30):
         try:
-            if not prompt or prompt.strip() == '':
+            user_text = prompt.get("user") if isinstance(prompt, dict) else prompt
+            if not user_text or user_text.strip() == '':
                 raise ValueError("Prompt cannot be empty")
 
+            effective_temperature = temperature if temperature is not None else self.temperature
+            effective_max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+
+            cache_key = None
+            if effective_temperature <= ANSWER_CACHE_MAX_TEMPERATURE:
+                cache_key = hashlib.md5(
+                    f"{self.model_name}|{effective_temperature}|{effective_max_tokens}|"
+                    f"{self._prompt_text(prompt)}".encode('utf-8')
+                ).hexdigest()
+                cached = self._answer_cache_get(cache_key)
+                if cached is not None:
+                    logger.debug("Answer cache hit for key %s", cache_key)
+                    return cached
+
             response = self.client.chat.completions.create(
                 model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature if temperature is not None else self.temperature,
-                max_tokens=max_tokens if max_tokens is not None else self.max_tokens,
+                messages=self._build_messages(prompt),
+                temperature=effective_temperature,
+                max_tokens=effective_max_tokens,
                 timeout=timeout,
             )
 
@@ -67,58 +182,105 @@ class LLMService:
             if not answer:
                 raise ValueError("Empty response from LLM")
 
+            if cache_key is not None:
+                self._answer_cache_put(cache_key, answer)
+
             return answer
 
         except Exception as e:
             logger.error("LLM generation error: %s", str(e))
             raise
 
-    def build_text_query_prompt(self, context, query):
-        return f"""You are a helpful AI assistant answering questions about video content.
-
-Video Content:
-{context}
+    def prime_canned(self, entries, embedder):
+        """Load canned (question, answer) pairs into the in-RAM hot set.
 
-Question: {query}
+        entries is an iterable of (question, answer) strings; embedder maps a
+        question to its embedding (e.g. EmbeddingService.encode). Replaces
+        any previously primed set.
+        """
+        embeddings = []
+        answers = []
+        for question, answer in entries:
+            embedding = np.asarray(embedder(question), dtype=np.float32).ravel()
+            embedding /= np.linalg.norm(embedding) or 1.0
+            embeddings.append(embedding)
+            answers.append(answer)
 
-{TEXT_QUERY_INSTRUCTIONS}
+        self._canned_matrix = np.vstack(embeddings) if embeddings else None
+        self._canned_answers = answers
+        logger.info("Primed %s canned answers", len(answers))
 
-Provide a clear and helpful answer:"""
+    def clear_canned(self):
+        self._canned_matrix = None
+        self._canned_answers = []
 
-    def build_image_query_prompt(self, extracted_text, video_context, user_query, instructions=None):
-        instruction_block = instructions or IMAGE_QUERY_INSTRUCTIONS
-        effective_query = user_query if user_query else "Explain what's in the image and provide relevant information."
-        effective_context = video_context if video_context else "No related video content found."
+    def has_canned(self):
+        return self._canned_matrix is not None
 
-        return f"""You are a helpful AI assistant that combines information from multiple sources.
+    def maybe_canned(self, query_embedding, threshold=CANNED_ANSWER_THRESHOLD):
+        """Canned answer for a near-duplicate primed question, or None."""
+        if self._canned_matrix is None:
+            return None
 
-TEXT EXTRACTED FROM IMAGE (via OCR):
-{extracted_text}
+        q = np.asarray(query_embedding, dtype=np.float32).ravel()
+        q = q / (np.linalg.norm(q) or 1.0)
+        sims = self._canned_matrix @ q
+        best = int(np.argmax(sims))
+        if sims[best] >= threshold:
+            logger.debug("Canned answer hit (similarity=%.3f)", float(sims[best]))
+            return self._canned_answers[best]
+        return None
 
-RELATED CONTENT FROM VIDEO DATABASE:
-{effective_context}
+    def build_text_query_prompt(self, context, query):
+        # Static instructions lead the system message and dynamic content
+        # comes last in the user message, keeping the cacheable prefix
+        # byte-identical across calls. Segment concatenation avoids the
+        # intermediate strings an f-string template would allocate per call.
+        return {
+            "system": _TEXT_SYSTEM,
+            "user": _TEXT_USER_SEGMENTS[0] + context
+                    + _TEXT_USER_SEGMENTS[1] + query
+                    + _TEXT_USER_SEGMENTS[2],
+        }
 
-USER QUESTION: {effective_query}
+    def build_image_query_prompt(self, extracted_text, video_context, user_query, instructions=None):
+        effective_query = user_query if user_query else "Explain what's in the image and provide relevant information."
+        effective_context = video_context if video_context else "No related video content found."
 
-{instruction_block}
+        if instructions is None or instructions == IMAGE_QUERY_INSTRUCTIONS:
+            system = _IMAGE_SYSTEM_DEFAULT
+        else:
+            system = instructions + _IMAGE_SYSTEM_SUFFIX
 
-Provide a comprehensive answer:"""
+        return {
+            "system": system,
+            "user": _IMAGE_USER_SEGMENTS[0] + extracted_text
+                    + _IMAGE_USER_SEGMENTS[1] + effective_context
+                    + _IMAGE_USER_SEGMENTS[2] + effective_query
+                    + _IMAGE_USER_SEGMENTS[3],
+        }
 
     def generate_streaming(self, prompt, temperature=None, max_tokens=None):
         try:
-            if not prompt or prompt.strip() == '':
+            user_text = prompt.get("user") if isinstance(prompt, dict) else prompt
+            if not user_text or user_text.strip() == '':
                 raise ValueError("Prompt cannot be empty")
 
+            start_time = time.perf_counter()
             stream = self.client.chat.completions.create(
                 model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
+                messages=self._build_messages(prompt),
                 temperature=temperature if temperature is not None else self.temperature,
                 max_tokens=max_tokens if max_tokens is not None else self.max_tokens,
                 stream=True,
             )
 
+            first_chunk = True
             for chunk in stream:
                 if chunk.choices[0].delta.content:
+                    if first_chunk:
+                        first_chunk = False
+                        logger.info("TTFT=%.3fs", time.perf_counter() - start_time)
                     yield chunk.choices[0].delta.content
 
         except Exception as e:
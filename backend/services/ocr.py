@@ -1,12 +1,66 @@
+import concurrent.futures
+import io
 import logging
-import os
-import tempfile
+import random
+import re
 import time
 
 import ocrspace
+import requests
 
 logger = logging.getLogger(__name__)
 
+# Error-classification patterns, compiled once; re.I makes the per-call
+# str.lower() allocation unnecessary.
+_TIMEOUT_RE = re.compile(
+    r'timed out|connecttimeout|readtimeout|connection to api\.ocr\.space timed out',
+    re.IGNORECASE,
+)
+_CONNECTION_RE = re.compile(
+    r'connection error|max retries exceeded|failed to establish a new connection'
+    r'|name or service not known|temporary failure in name resolution'
+    r'|connection aborted',
+    re.IGNORECASE,
+)
+
+# Process-wide pool for concurrent OCR calls. OCR is a blocking network RPC,
+# so threads overlap cleanly; one shared pool bounds the total number of
+# in-flight requests against api.ocr.space regardless of service instances.
+_OCR_POOL = concurrent.futures.ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix='ocr-worker'
+)
+
+
+class _PooledAPI(ocrspace.API):
+    """ocrspace.API variant that posts through a shared requests.Session.
+
+    The upstream class calls module-level requests.post with no timeout, so
+    a hung call blocks a worker until TCP gives up; routing through a
+    session keeps the connection to api.ocr.space alive across calls and
+    bounds every request with an explicit timeout.
+    """
+
+    def __init__(self, session, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+        self.session = session
+        self.timeout = timeout
+
+    def ocr_file(self, fp):
+        with (open(fp, 'rb') if type(fp) == str else fp) as f:
+            r = self.session.post(
+                self.endpoint,
+                files={'filename': f},
+                data=self.payload,
+                timeout=self.timeout,
+            )
+        return self._parse(r.json())
+
+    def ocr_url(self, url):
+        data = self.payload
+        data['url'] = url
+        r = self.session.post(self.endpoint, data=data, timeout=self.timeout)
+        return self._parse(r.json())
+
 OCR_QUERY_INSTRUCTIONS = """INSTRUCTIONS:
 - Analyze the text extracted from the image
 - Use the related video content to provide additional context
@@ -22,14 +76,20 @@ OCR_QUERY_INSTRUCTIONS = """INSTRUCTIONS:
 
 
 class OCRService:
-    def __init__(self, api_key, ocr_engine=2, timeout=20, retries=2, retry_delay=1.5):
+    def __init__(self, api_key, ocr_engine=2, timeout=20, retries=2, retry_delay=1.5,
+                 session=None):
         try:
             if not api_key:
                 raise ValueError("OCR_SPACE_API_KEY is required")
 
-            self.api = ocrspace.API(api_key=api_key)
             self.ocr_engine = ocr_engine
             self.timeout = float(timeout)
+            # Always go through _PooledAPI so self.timeout actually bounds
+            # the request; without a shared session each service gets its
+            # own private one.
+            if session is None:
+                session = requests.Session()
+            self.api = _PooledAPI(session, timeout=self.timeout, api_key=api_key)
             self.retries = max(0, int(retries))
             self.retry_delay = max(0.0, float(retry_delay))
 
@@ -45,68 +105,58 @@ class OCRService:
 
     @staticmethod
     def _is_timeout_error(error):
-        message = str(error).lower()
-        timeout_markers = [
-            "timed out",
-            "connecttimeout",
-            "readtimeout",
-            "connection to api.ocr.space timed out",
-        ]
-        return any(marker in message for marker in timeout_markers)
+        return bool(_TIMEOUT_RE.search(str(error)))
 
     @staticmethod
     def _is_connection_error(error):
-        message = str(error).lower()
-        connection_markers = [
-            "connection error",
-            "max retries exceeded",
-            "failed to establish a new connection",
-            "name or service not known",
-            "temporary failure in name resolution",
-            "connection aborted",
-        ]
-        return any(marker in message for marker in connection_markers)
-
-    def _ocr_file_with_retry(self, tmp_path):
+        return bool(_CONNECTION_RE.search(str(error)))
+
+    def _backoff_delay(self, attempt):
+        """Capped exponential backoff with full jitter.
+
+        Spreading retries over [0, retry_delay * 2^(attempt-1)] avoids
+        synchronized retry bursts against the provider when it degrades.
+        """
+        return random.uniform(0, min(self.retry_delay * 2 ** (attempt - 1), 30.0))
+
+    def _ocr_bytes_with_retry(self, image_bytes):
         attempts = self.retries + 1
         last_error = None
 
         for attempt in range(1, attempts + 1):
             try:
-                # ocrspace library does not expose request timeout directly.
-                return self.api.ocr_file(tmp_path)
+                # ocr_file accepts any file object; a fresh BytesIO per
+                # attempt keeps the image in RAM instead of a temp file
+                # (ocr_file closes the buffer after posting). The name
+                # attribute supplies the multipart filename.
+                buffer = io.BytesIO(image_bytes)
+                buffer.name = 'image.jpg'
+                return self.api.ocr_file(buffer)
             except Exception as e:
                 last_error = e
                 if attempt >= attempts:
                     break
                 if self._is_timeout_error(e) or self._is_connection_error(e):
+                    delay = self._backoff_delay(attempt)
                     logger.warning(
-                        "OCR attempt %s/%s failed (%s). Retrying in %ss...",
+                        "OCR attempt %s/%s failed (%s). Retrying in %.2fs...",
                         attempt,
                         attempts,
                         str(e),
-                        self.retry_delay,
+                        delay,
                     )
-                    time.sleep(self.retry_delay)
+                    time.sleep(delay)
                     continue
                 raise
 
         raise last_error
 
     def extract_text(self, image_bytes, language='eng', detect_orientation=True):
-        tmp_path = None
         try:
             if not image_bytes or len(image_bytes) == 0:
                 raise ValueError("Image bytes cannot be empty")
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp:
-                tmp.write(image_bytes)
-                tmp_path = tmp.name
-
-            extracted_text = self._ocr_file_with_retry(tmp_path)
-
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
+            extracted_text = self._ocr_bytes_with_retry(image_bytes)
 
             if not extracted_text or len(extracted_text.strip()) == 0:
                 return "No text found in image"
@@ -115,12 +165,6 @@ class OCRService:
             return extracted_text.strip()
 
         except Exception as e:
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
-
             if self._is_timeout_error(e):
                 logger.warning("OCR request timed out after retries: %s", str(e))
                 return "Error: OCR service timed out. Please retry in a moment."
@@ -132,6 +176,21 @@ class OCRService:
             logger.error("OCR extraction error: %s", str(e))
             raise
 
+    def extract_text_async(self, image_bytes, language='eng', detect_orientation=True):
+        """Run extract_text on the shared pool; returns a Future."""
+        return _OCR_POOL.submit(
+            self.extract_text, image_bytes, language, detect_orientation
+        )
+
+    def extract_text_batch(self, images):
+        """Extract text from several images concurrently.
+
+        Results are returned in input order; per-image errors surface as
+        the same "Error: ..." strings extract_text produces.
+        """
+        futures = [self.extract_text_async(image_bytes) for image_bytes in images]
+        return [future.result() for future in futures]
+
     def extract_text_from_url(self, image_url):
         try:
             if not image_url or image_url.strip() == '':
@@ -150,14 +209,15 @@ class OCRService:
                     if attempt >= attempts:
                         break
                     if self._is_timeout_error(e) or self._is_connection_error(e):
+                        delay = self._backoff_delay(attempt)
                         logger.warning(
-                            "OCR URL attempt %s/%s failed (%s). Retrying in %ss...",
+                            "OCR URL attempt %s/%s failed (%s). Retrying in %.2fs...",
                             attempt,
                             attempts,
                             str(e),
-                            self.retry_delay,
+                            delay,
                         )
-                        time.sleep(self.retry_delay)
+                        time.sleep(delay)
                         continue
                     raise
 
@@ -1,11 +1,22 @@
 from gtts import gTTS
-import tempfile
-import os
+import io
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Compiled once at import; clean_text runs them in sequence per call. The
+# markdown emphasis strippers are merged into one alternation so a single
+# pass handles both ** and * spans.
+_RE_BULLETS = re.compile(r'[•\-\*]\s*')
+_RE_EMPHASIS = re.compile(r'\*{1,2}(.+?)\*{1,2}')
+_RE_HEADINGS = re.compile(r'#{1,6}\s*')
+_RE_NEWLINES = re.compile(r'\n+')
+_RE_WHITESPACE = re.compile(r'\s+')
+_RE_DOTS = re.compile(r'\.\.+')
+_RE_UNSAFE = re.compile(r'[^\w\s\.,!?\'\"-]')
+
+
 class TTSService:
     def __init__(self, language='en', slow=False):
         try:
@@ -21,14 +32,13 @@ class TTSService:
             if not text or text.strip() == '':
                 raise ValueError("Text cannot be empty")
             
-            cleaned = re.sub(r'[•\-\*]\s*', '', text)
-            cleaned = re.sub(r'\*\*(.+?)\*\*', r'\1', cleaned)
-            cleaned = re.sub(r'\*(.+?)\*', r'\1', cleaned)
-            cleaned = re.sub(r'#{1,6}\s*', '', cleaned)
-            cleaned = re.sub(r'\n+', '. ', cleaned)
-            cleaned = re.sub(r'\s+', ' ', cleaned)
-            cleaned = re.sub(r'\.\.+', '.', cleaned)
-            cleaned = re.sub(r'[^\w\s\.,!?\'\"-]', '', cleaned)
+            cleaned = _RE_BULLETS.sub('', text)
+            cleaned = _RE_EMPHASIS.sub(r'\1', cleaned)
+            cleaned = _RE_HEADINGS.sub('', cleaned)
+            cleaned = _RE_NEWLINES.sub('. ', cleaned)
+            cleaned = _RE_WHITESPACE.sub(' ', cleaned)
+            cleaned = _RE_DOTS.sub('.', cleaned)
+            cleaned = _RE_UNSAFE.sub('', cleaned)
             
             return cleaned.strip()
         
@@ -37,40 +47,30 @@ class TTSService:
             raise
     
     def generate_audio(self, text, language=None, slow=None):
-        tmp_path = None
         try:
             if not text or text.strip() == '':
                 raise ValueError("Text cannot be empty for TTS")
-            
+
             clean_text = self.clean_text(text)
-            
+
             if len(clean_text) == 0:
                 raise ValueError("Cleaned text is empty")
-            
+
             lang = language or self.language
             is_slow = slow if slow is not None else self.slow
-            
+
             tts = gTTS(text=clean_text, lang=lang, slow=is_slow)
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp:
-                tmp_path = tmp.name
-                tts.save(tmp_path)
-            
-            with open(tmp_path, 'rb') as f:
-                audio_bytes = f.read()
-            
-            if tmp_path and os.path.exists(tmp_path):
-                os.remove(tmp_path)
-            
+
+            # MP3 goes straight into an in-memory buffer; no temp-file
+            # write/read/unlink round-trip per request.
+            buffer = io.BytesIO()
+            tts.write_to_fp(buffer)
+            audio_bytes = buffer.getvalue()
+
             logger.info(f"✓ TTS generated {len(audio_bytes)} bytes audio")
             return audio_bytes
-        
+
         except Exception as e:
-            if tmp_path and os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except:
-                    pass
             logger.error(f"TTS generation error: {str(e)}")
             raise
     
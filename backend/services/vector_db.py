@@ -1,8 +1,9 @@
-import ast
 import csv
 import logging
-import math
 import os
+import time
+
+import numpy as np
 
 try:
     import chromadb  # type: ignore
@@ -11,14 +12,46 @@ except Exception as exc:  # pragma: no cover - environment-dependent import
     chromadb = None
     CHROMADB_IMPORT_ERROR = exc
 
+try:
+    import faiss  # type: ignore
+except Exception:  # pragma: no cover - environment-dependent import
+    faiss = None
+
+try:
+    import numba  # type: ignore
+except Exception:  # pragma: no cover - environment-dependent import
+    numba = None
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _cos_scan(matrix, q):
+        """Parallel inner-product scan over unit-norm rows."""
+        n = matrix.shape[0]
+        d = matrix.shape[1]
+        out = np.empty(n, dtype=np.float32)
+        for i in numba.prange(n):
+            acc = np.float32(0.0)
+            for j in range(d):
+                acc += matrix[i, j] * q[j]
+            out[i] = acc
+        return out
+else:
+    _cos_scan = None
+
 logger = logging.getLogger(__name__)
 
+# Chroma's count() is a SQLite scan; health polling should not pay it on
+# every request. The corpus is read-only at serving time, so a short TTL is
+# purely defensive.
+COUNT_CACHE_TTL_SECONDS = 5.0
+
 
 class VectorDBService:
     def __init__(self, db_path='./chroma_db', collection_name='video_chunks'):
         self.mode = "chroma"
         self.collection_name = collection_name
         self._fallback_records = []
+        self._count_cache = (0, 0.0)
 
         fallback_csv_path = os.getenv(
             "EMBEDDINGS_CSV_PATH",
@@ -52,6 +85,7 @@ class VectorDBService:
             try:
                 self.collection = self.client.get_collection(name=collection_name)
                 count = self.collection.count()
+                self._count_cache = (count, time.monotonic())
                 logger.info("ChromaDB connected: %s chunks available in '%s'", count, collection_name)
             except Exception as exc:
                 logger.warning(
@@ -78,6 +112,7 @@ class VectorDBService:
             )
 
         records = []
+        raw_embeddings = []
         with open(csv_path, "r", encoding="utf-8", newline="") as handle:
             reader = csv.DictReader(handle)
             for row in reader:
@@ -86,24 +121,11 @@ class VectorDBService:
                 if not text or not emb_raw:
                     continue
 
-                try:
-                    embedding = ast.literal_eval(emb_raw)
-                except Exception:
-                    continue
-
-                if not isinstance(embedding, list) or not embedding:
-                    continue
-
-                try:
-                    embedding = [float(value) for value in embedding]
-                except Exception:
-                    continue
-
+                raw_embeddings.append(emb_raw)
                 records.append(
                     {
                         "id": str(len(records)),
                         "text": text,
-                        "embedding": embedding,
                         "metadata": {
                             "index": row.get("index"),
                             "chunk_num": row.get("chunk_num"),
@@ -114,36 +136,197 @@ class VectorDBService:
         if not records:
             raise ValueError(f"No valid embeddings found in fallback CSV: {csv_path}")
 
+        matrix, kept = self._load_fallback_matrix(csv_path, raw_embeddings)
+        if matrix is None:
+            raise ValueError(f"No valid embeddings found in fallback CSV: {csv_path}")
+        if kept is not None:
+            records = [records[i] for i in kept]
+            for position, record in enumerate(records):
+                record["id"] = str(position)
+
         self.mode = "fallback_csv"
         self._fallback_records = records
+        self._id_index = {record["id"]: record for record in records}
+        self._fallback_matrix = matrix
+        self._fallback_dim = matrix.shape[1]
+
+        # Optional int8 quantization: rows are unit-norm, so one global scale
+        # loses little precision while quartering scan bandwidth vs float32.
+        self._fallback_quantized = os.getenv(
+            "FALLBACK_INT8", "False"
+        ).lower() in ("true", "1", "yes")
+        if self._fallback_quantized:
+            self._fallback_scale = 127.0 / (float(np.max(np.abs(self._fallback_matrix))) or 1.0)
+            self._fallback_int8 = np.round(
+                self._fallback_matrix * self._fallback_scale
+            ).astype(np.int8)
+            self._fallback_matrix = None
+            logger.info("Fallback matrix quantized to int8 (scale=%.3f)", self._fallback_scale)
+
+        self._fallback_index = None
+        if faiss is not None and self._fallback_matrix is not None:
+            self._initialize_fallback_index(csv_path)
+
+        # Without FAISS, warm the optional numba kernel at init so its JIT
+        # compile does not land on the first request.
+        self._use_numba_scan = (
+            _cos_scan is not None
+            and self._fallback_index is None
+            and self._fallback_matrix is not None
+        )
+        if self._use_numba_scan:
+            try:
+                _cos_scan(self._fallback_matrix[:1], np.zeros(self._fallback_dim, dtype=np.float32))
+            except Exception as exc:
+                self._use_numba_scan = False
+                logger.warning("numba scan kernel unavailable, using BLAS matvec: %s", str(exc))
+
         logger.info("Fallback vector DB initialized from CSV with %s records", len(self._fallback_records))
 
-    @staticmethod
-    def _cosine_similarity(vec_a, vec_b):
-        if len(vec_a) != len(vec_b):
-            return -1.0
+    def _load_fallback_matrix(self, csv_path, raw_embeddings):
+        """Parse embedding strings into a unit-norm float32 matrix, cached as .npy.
+
+        np.fromstring parses each "[f, f, ...]" row in C instead of building
+        a Python AST and float objects per row. Rows are L2-normalized once
+        (so cosine similarity is a plain inner product) and the matrix is
+        persisted next to the CSV; while the cache is newer than the CSV it
+        is memory-mapped instead of reparsed, so gunicorn workers share one
+        set of physical pages rather than each holding a private copy.
+        Returns (matrix, kept) where kept lists the raw_embeddings indices
+        that parsed cleanly, or None when every row was kept.
+        """
+        cache_path = csv_path + ".unit.npy"
+        try:
+            if os.path.getmtime(cache_path) >= os.path.getmtime(csv_path):
+                matrix = np.load(cache_path, mmap_mode="r")
+                if matrix.ndim == 2 and matrix.shape[0] == len(raw_embeddings):
+                    logger.info("Memory-mapped cached embeddings matrix from %s", cache_path)
+                    return matrix, None
+                logger.warning("Stale embeddings cache at %s, reparsing CSV", cache_path)
+        except OSError:
+            pass
+
+        rows = []
+        kept = []
+        dim = None
+        for position, raw in enumerate(raw_embeddings):
+            try:
+                vector = np.fromstring(raw.strip().strip("[]"), sep=",", dtype=np.float32)
+            except ValueError:
+                continue
+            if vector.size == 0 or (dim is not None and vector.size != dim):
+                continue
+            if dim is None:
+                dim = vector.size
+            rows.append(vector)
+            kept.append(position)
+
+        if not rows:
+            return None, []
+
+        matrix = np.vstack(rows)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
 
-        dot = sum(a * b for a, b in zip(vec_a, vec_b))
-        norm_a = math.sqrt(sum(a * a for a in vec_a))
-        norm_b = math.sqrt(sum(b * b for b in vec_b))
+        try:
+            np.save(cache_path, matrix)
+            matrix = np.load(cache_path, mmap_mode="r")
+        except Exception as exc:
+            logger.warning("Could not cache embeddings matrix to %s: %s", cache_path, str(exc))
+
+        if len(kept) == len(raw_embeddings):
+            return matrix, None
+        return matrix, kept
+
+    def _initialize_fallback_index(self, csv_path):
+        """Build (or reload) a FAISS HNSW index over the fallback matrix.
+
+        Rows are unit-norm, so inner product equals cosine similarity. The
+        index is persisted next to the CSV and reloaded while it is newer
+        than the CSV, skipping the graph rebuild on subsequent starts.
+        """
+        index_path = csv_path + ".hnsw.faiss"
+        try:
+            if (
+                os.path.exists(index_path)
+                and os.path.getmtime(index_path) >= os.path.getmtime(csv_path)
+            ):
+                index = faiss.read_index(index_path)
+                if index.ntotal == len(self._fallback_records) and index.d == self._fallback_dim:
+                    self._fallback_index = index
+                    logger.info("Loaded FAISS HNSW index from %s", index_path)
+                    return
+                logger.warning("Stale FAISS index at %s, rebuilding", index_path)
+
+            index = faiss.IndexHNSWFlat(self._fallback_dim, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+            index.add(self._fallback_matrix)
+            self._fallback_index = index
+            try:
+                faiss.write_index(index, index_path)
+            except Exception as exc:
+                logger.warning("Could not persist FAISS index to %s: %s", index_path, str(exc))
+        except Exception as exc:
+            self._fallback_index = None
+            logger.warning("FAISS index unavailable, using linear scan: %s", str(exc))
+
+    def _fallback_top_k(self, query_embedding, top_k):
+        """Indices and cosine similarities of the top_k closest fallback rows."""
+        # np.array (not asarray) so normalizing q never mutates the caller's
+        # embedding in place.
+        q = np.array(query_embedding, dtype=np.float32).ravel()
+        if q.shape[0] != self._fallback_dim:
+            raise ValueError(
+                f"Query embedding dimension {q.shape[0]} does not match "
+                f"stored dimension {self._fallback_dim}"
+            )
 
-        if norm_a == 0.0 or norm_b == 0.0:
-            return -1.0
+        q /= np.linalg.norm(q) or 1.0
 
-        return dot / (norm_a * norm_b)
+        if self._fallback_index is not None:
+            sims, indices = self._fallback_index.search(
+                q.reshape(1, -1), min(top_k, len(self._fallback_records))
+            )
+            keep = indices[0] >= 0
+            return indices[0][keep], sims[0][keep]
+
+        if self._fallback_quantized:
+            # Integer dot products with int32 accumulation; scores are
+            # dequantized back to cosine space afterwards.
+            q_scale = 127.0 / (float(np.max(np.abs(q))) or 1.0)
+            q_int = np.round(q * q_scale).astype(np.int32)
+            sims = (self._fallback_int8 @ q_int).astype(np.float32)
+            sims /= self._fallback_scale * q_scale
+        elif self._use_numba_scan:
+            sims = _cos_scan(self._fallback_matrix, q)
+        else:
+            sims = self._fallback_matrix @ q
+
+        top_k = min(top_k, sims.shape[0])
+        if top_k < sims.shape[0]:
+            candidates = np.argpartition(-sims, top_k)[:top_k]
+        else:
+            candidates = np.arange(sims.shape[0])
+        order = candidates[np.argsort(-sims[candidates])]
+        return order, sims[order]
 
     def search(self, query_embedding, top_k=5):
         try:
-            if not query_embedding:
+            if query_embedding is None or len(query_embedding) == 0:
                 raise ValueError("Query embedding cannot be empty")
 
-            if not isinstance(query_embedding, list):
-                raise ValueError("Query embedding must be a list")
+            if not isinstance(query_embedding, (list, tuple, np.ndarray)):
+                raise ValueError("Query embedding must be a list or ndarray")
 
             if top_k < 1:
                 raise ValueError("top_k must be at least 1")
 
             if self.mode == "chroma":
+                # Chroma 0.4.x validates embeddings as lists of Python
+                # numbers, so ndarrays are converted at this boundary only.
+                if isinstance(query_embedding, np.ndarray):
+                    query_embedding = query_embedding.tolist()
                 results = self.collection.query(
                     query_embeddings=[query_embedding],
                     n_results=top_k
@@ -151,19 +334,14 @@ class VectorDBService:
                 logger.info("Search returned %s results", len(results['documents'][0]))
                 return results
 
-            scored = []
-            for record in self._fallback_records:
-                similarity = self._cosine_similarity(query_embedding, record["embedding"])
-                scored.append((similarity, record))
-
-            scored.sort(key=lambda item: item[0], reverse=True)
-            top = scored[:top_k]
+            indices, sims = self._fallback_top_k(query_embedding, top_k)
+            top = [self._fallback_records[i] for i in indices]
 
             results = {
-                "ids": [[item[1]["id"] for item in top]],
-                "documents": [[item[1]["text"] for item in top]],
-                "metadatas": [[item[1]["metadata"] for item in top]],
-                "distances": [[1.0 - item[0] for item in top]],
+                "ids": [[record["id"] for record in top]],
+                "documents": [[record["text"] for record in top]],
+                "metadatas": [[record["metadata"] for record in top]],
+                "distances": [[1.0 - float(sim) for sim in sims]],
             }
             logger.info("Fallback search returned %s results", len(results['documents'][0]))
             return results
@@ -172,12 +350,81 @@ class VectorDBService:
             logger.error("Vector search error: %s", str(exc))
             raise
 
+    def search_many(self, query_embeddings, top_k=5):
+        """Search several query embeddings in one call.
+
+        Returns the same structure as search() with one inner list per query.
+        Chroma handles the whole batch in a single query(); the CSV fallback
+        scans per embedding.
+        """
+        try:
+            if query_embeddings is None or len(query_embeddings) == 0:
+                raise ValueError("Query embeddings cannot be empty")
+
+            if top_k < 1:
+                raise ValueError("top_k must be at least 1")
+
+            if self.mode == "chroma":
+                if isinstance(query_embeddings, np.ndarray):
+                    query_embeddings = query_embeddings.tolist()
+                else:
+                    query_embeddings = [
+                        emb.tolist() if isinstance(emb, np.ndarray) else emb
+                        for emb in query_embeddings
+                    ]
+                results = self.collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=top_k
+                )
+                logger.info("Batch search processed %s queries", len(query_embeddings))
+                return results
+
+            merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+            if self._fallback_index is None and not self._fallback_quantized:
+                # One GEMM scores the whole batch against the shared
+                # (mmapped) matrix instead of a matvec per query.
+                batch = np.array(
+                    [np.asarray(e, dtype=np.float32).ravel() for e in query_embeddings],
+                    dtype=np.float32,
+                )
+                norms = np.linalg.norm(batch, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                batch /= norms
+
+                sims_all = batch @ self._fallback_matrix.T
+                effective_k = min(top_k, sims_all.shape[1])
+                for sims in sims_all:
+                    if effective_k < sims.shape[0]:
+                        candidates = np.argpartition(-sims, effective_k)[:effective_k]
+                    else:
+                        candidates = np.arange(sims.shape[0])
+                    order = candidates[np.argsort(-sims[candidates])]
+                    top = [self._fallback_records[i] for i in order]
+                    merged["ids"].append([record["id"] for record in top])
+                    merged["documents"].append([record["text"] for record in top])
+                    merged["metadatas"].append([record["metadata"] for record in top])
+                    merged["distances"].append([1.0 - float(sims[i]) for i in order])
+                return merged
+
+            for embedding in query_embeddings:
+                single = self.search(embedding, top_k)
+                for key in merged:
+                    merged[key].append(single[key][0])
+            return merged
+
+        except Exception as exc:
+            logger.error("Batch vector search error: %s", str(exc))
+            raise
+
     def search_with_filter(self, query_embedding, top_k=5, where=None):
         try:
-            if not query_embedding:
+            if query_embedding is None or len(query_embedding) == 0:
                 raise ValueError("Query embedding cannot be empty")
 
             if self.mode == "chroma":
+                if isinstance(query_embedding, np.ndarray):
+                    query_embedding = query_embedding.tolist()
                 results = self.collection.query(
                     query_embeddings=[query_embedding],
                     n_results=top_k,
@@ -195,7 +442,13 @@ class VectorDBService:
     def get_count(self):
         try:
             if self.mode == "chroma":
-                return self.collection.count()
+                count, cached_at = self._count_cache
+                now = time.monotonic()
+                if now - cached_at < COUNT_CACHE_TTL_SECONDS:
+                    return count
+                count = self.collection.count()
+                self._count_cache = (count, now)
+                return count
             return len(self._fallback_records)
         except Exception as exc:
             logger.error("Count error: %s", str(exc))
@@ -212,8 +465,7 @@ class VectorDBService:
             if self.mode == "chroma":
                 return self.collection.get(ids=ids)
 
-            id_set = set(ids)
-            matched = [record for record in self._fallback_records if record["id"] in id_set]
+            matched = [self._id_index[record_id] for record_id in ids if record_id in self._id_index]
             return {
                 "ids": [record["id"] for record in matched],
                 "documents": [record["text"] for record in matched],
@@ -250,7 +502,7 @@ class VectorDBService:
 
             return {
                 'name': self.collection_name,
-                'count': self.collection.count(),
+                'count': self.get_count(),
                 'metadata': self.collection.metadata
             }
         except Exception as exc:
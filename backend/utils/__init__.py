@@ -16,6 +16,7 @@ from .validators import (
     validate_image_file,
     validate_api_key,
     validate_top_k,
+    validate_query_request,
     validate_query_length,
     is_valid_url,
     is_safe_filename
@@ -36,6 +37,7 @@ __all__ = [
     'validate_image_file',
     'validate_api_key',
     'validate_top_k',
+    'validate_query_request',
     'validate_query_length',
     'is_valid_url',
     'is_safe_filename'
@@ -1,6 +1,8 @@
+import functools
 import re
 import os
 from typing import Optional, Tuple
+from urllib.parse import urlsplit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,15 +12,37 @@ MAX_FILE_SIZE_MB = 16
 MAX_QUERY_LENGTH = 1000
 MIN_QUERY_LENGTH = 1
 
+# Compiled once at import; validators run on every request, so the
+# patterns never hit the re module's per-call cache lookup.
+_API_KEY_RE = re.compile(r'^[A-Za-z0-9_\-\.]+$')
+_DANGEROUS_FILENAME_CHARS = frozenset('<>:"|?*')
+_SUPPORTED_LANGUAGES = frozenset(('en', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'zh', 'ja', 'ko'))
+
+# Rejection messages that only depend on module constants, rendered once
+# (sorted, so the listed order is stable across processes).
+_INVALID_IMAGE_TYPE_MSG = "Invalid file type. Allowed: " + ', '.join(sorted(ALLOWED_IMAGE_EXTENSIONS))
+_UNSUPPORTED_LANGUAGE_MSG = "Unsupported language. Supported: " + ', '.join(sorted(_SUPPORTED_LANGUAGES))
+_LANG_CODE_RE = re.compile(r'^[a-z]{2}(-[A-Z]{2})?$')
+# Hostname check for is_valid_url; the scheme/port/path parts are handled
+# by urlsplit, which is much cheaper than backtracking over a full-URL regex.
+_HOSTNAME_RE = re.compile(
+    r'^(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,6}\.?$'
+)
+
+# The validators below are pure functions of their arguments and return
+# immutable tuples, so repeated inputs (retried queries, the same API key
+# on every request) are answered from an lru_cache.
+
+@functools.lru_cache(maxsize=256)
 def validate_text_input(text: str, min_length: int = MIN_QUERY_LENGTH, max_length: int = MAX_QUERY_LENGTH) -> Tuple[bool, Optional[str]]:
     """
     Validate text input.
-    
+
     Args:
         text (str): Text to validate
         min_length (int): Minimum length
         max_length (int): Maximum length
-        
+
     Returns:
         tuple: (is_valid, error_message)
     """
@@ -71,11 +95,13 @@ def validate_image_file(file, max_size_mb: int = MAX_FILE_SIZE_MB) -> Tuple[bool
     if not is_valid:
         return False, error
     
-    filename = file.filename.lower()
-    extension = filename.rsplit('.', 1)[-1] if '.' in filename else ''
+    # Slice out just the extension; lowercasing the whole filename and
+    # splitting allocates two throwaway strings per upload.
+    dot = file.filename.rfind('.')
+    extension = file.filename[dot + 1:].lower() if dot != -1 else ''
     
     if extension not in ALLOWED_IMAGE_EXTENSIONS:
-        return False, f"Invalid file type. Allowed: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}"
+        return False, _INVALID_IMAGE_TYPE_MSG
     
     if hasattr(file, 'content_length') and file.content_length:
         size_mb = file.content_length / (1024 * 1024)
@@ -84,6 +110,7 @@ def validate_image_file(file, max_size_mb: int = MAX_FILE_SIZE_MB) -> Tuple[bool
     
     return True, None
 
+@functools.lru_cache(maxsize=64)
 def validate_api_key(api_key: str, key_name: str = "API key") -> Tuple[bool, Optional[str]]:
     """
     Validate API key format.
@@ -103,23 +130,55 @@ def validate_api_key(api_key: str, key_name: str = "API key") -> Tuple[bool, Opt
     if len(api_key) < 10:
         return False, f"{key_name} is too short"
     
-    if not re.match(r'^[A-Za-z0-9_\-\.]+$', api_key):
+    if not _API_KEY_RE.match(api_key):
         return False, f"{key_name} contains invalid characters"
     
     return True, None
 
+def validate_query_request(query: str, top_k: any) -> Tuple[bool, Optional[str], int]:
+    """
+    Validate the (query, top_k) pair shared by the query routes.
+
+    An invalid top_k is not fatal: it is coerced to its fallback value
+    and logged, matching the individual validators.
+
+    Args:
+        query (str): Query text
+        top_k: Requested number of results
+
+    Returns:
+        tuple: (is_valid, error_message, validated_top_k)
+    """
+    is_valid, error = validate_text_input(query)
+    if not is_valid:
+        return False, error, 5
+
+    is_valid_k, error_k, top_k = validate_top_k(top_k)
+    if not is_valid_k:
+        logger.warning("Invalid top_k: %s, using default: %s", error_k, top_k)
+
+    return True, None, top_k
+
 def validate_top_k(top_k: any, min_value: int = 1, max_value: int = 20) -> Tuple[bool, Optional[str], int]:
     """
     Validate top_k parameter.
-    
+
     Args:
         top_k: Value to validate
         min_value (int): Minimum allowed value
         max_value (int): Maximum allowed value
-        
+
     Returns:
         tuple: (is_valid, error_message, validated_value)
     """
+    try:
+        return _validate_top_k_cached(top_k, min_value, max_value)
+    except TypeError:
+        # Unhashable input cannot be an integer either.
+        return False, "top_k must be an integer", 5
+
+@functools.lru_cache(maxsize=32)
+def _validate_top_k_cached(top_k, min_value, max_value):
     try:
         top_k_int = int(top_k)
     except (ValueError, TypeError):
@@ -133,6 +192,7 @@ def validate_top_k(top_k: any, min_value: int = 1, max_value: int = 20) -> Tuple
     
     return True, None, top_k_int
 
+@functools.lru_cache(maxsize=256)
 def validate_query_length(query: str, max_length: int = MAX_QUERY_LENGTH) -> Tuple[bool, Optional[str]]:
     """
     Validate query length.
@@ -157,6 +217,7 @@ def validate_query_length(query: str, max_length: int = MAX_QUERY_LENGTH) -> Tup
     
     return True, None
 
+@functools.lru_cache(maxsize=256)
 def is_valid_url(url: str) -> bool:
     """
     Check if string is a valid URL.
@@ -167,20 +228,34 @@ def is_valid_url(url: str) -> bool:
     Returns:
         bool: True if valid URL
     """
-    if not url:
+    if not url or any(char.isspace() for char in url):
         return False
-    
-    url_pattern = re.compile(
-        r'^https?://'
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'
-        r'localhost|'
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'
-        r'(?::\d+)?'
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE
-    )
-    
-    return bool(url_pattern.match(url))
 
+    try:
+        parts = urlsplit(url)
+        parts.port  # raises ValueError on a non-numeric or out-of-range port
+    except ValueError:
+        return False
+
+    if parts.scheme not in ('http', 'https'):
+        return False
+
+    # No userinfo and no bare trailing colon in the authority.
+    if '@' in parts.netloc or parts.netloc.endswith(':'):
+        return False
+
+    host = parts.hostname or ''
+    if host == 'localhost' or _is_dotted_quad(host):
+        return True
+
+    return bool(_HOSTNAME_RE.match(host))
+
+def _is_dotted_quad(host: str) -> bool:
+    """True for four dot-separated groups of 1-3 digits (e.g. 192.168.0.1)."""
+    groups = host.split('.')
+    return len(groups) == 4 and all(g.isdigit() and len(g) <= 3 for g in groups)
+
+@functools.lru_cache(maxsize=256)
 def is_safe_filename(filename: str) -> bool:
     """
     Check if filename is safe (no path traversal).
@@ -199,13 +274,13 @@ def is_safe_filename(filename: str) -> bool:
     
     if filename.startswith('.'):
         return False
-    
-    dangerous_chars = ['<', '>', ':', '"', '|', '?', '*']
-    if any(char in filename for char in dangerous_chars):
+
+    if not _DANGEROUS_FILENAME_CHARS.isdisjoint(filename):
         return False
-    
+
     return True
 
+@functools.lru_cache(maxsize=64)
 def validate_language_code(lang_code: str) -> Tuple[bool, Optional[str]]:
     """
     Validate language code.
@@ -221,27 +296,33 @@ def validate_language_code(lang_code: str) -> Tuple[bool, Optional[str]]:
     
     lang_code = lang_code.strip().lower()
     
-    if not re.match(r'^[a-z]{2}(-[A-Z]{2})?$', lang_code):
+    if not _LANG_CODE_RE.match(lang_code):
         return False, "Invalid language code format"
     
-    supported_languages = ['en', 'es', 'fr', 'de', 'it', 'pt', 'ru', 'zh', 'ja', 'ko']
     base_lang = lang_code.split('-')[0]
-    
-    if base_lang not in supported_languages:
-        return False, f"Unsupported language. Supported: {', '.join(supported_languages)}"
+
+    if base_lang not in _SUPPORTED_LANGUAGES:
+        return False, _UNSUPPORTED_LANGUAGE_MSG
     
     return True, None
 
 def validate_temperature(temperature: any) -> Tuple[bool, Optional[str], float]:
     """
     Validate temperature parameter for LLM.
-    
+
     Args:
         temperature: Value to validate
-        
+
     Returns:
         tuple: (is_valid, error_message, validated_value)
     """
+    try:
+        return _validate_temperature_cached(temperature)
+    except TypeError:
+        return False, "Temperature must be a number", 0.7
+
+@functools.lru_cache(maxsize=32)
+def _validate_temperature_cached(temperature):
     try:
         temp_float = float(temperature)
     except (ValueError, TypeError):
@@ -255,13 +336,20 @@ def validate_temperature(temperature: any) -> Tuple[bool, Optional[str], float]:
 def validate_max_tokens(max_tokens: any) -> Tuple[bool, Optional[str], int]:
     """
     Validate max_tokens parameter.
-    
+
     Args:
         max_tokens: Value to validate
-        
+
     Returns:
         tuple: (is_valid, error_message, validated_value)
     """
+    try:
+        return _validate_max_tokens_cached(max_tokens)
+    except TypeError:
+        return False, "max_tokens must be an integer", 1000
+
+@functools.lru_cache(maxsize=32)
+def _validate_max_tokens_cached(max_tokens):
     try:
         tokens_int = int(max_tokens)
     except (ValueError, TypeError):